@@ -1,22 +1,45 @@
 import os
 import re
+import sys
+import argparse
 import json
 import asyncio
+import contextlib
+import dataclasses
+import hashlib
+import logging
+import tempfile
+import textwrap
+import time
+from collections import OrderedDict
 from typing import Any
+import httpx
+from aioconsole import ainput
 from dotenv import load_dotenv
 
 from agents import Agent, AsyncOpenAI, OpenAIChatCompletionsModel, Runner
 from agents.run import RunConfig
+from openai import DefaultAsyncHttpxClient
 
 # Setup
 load_dotenv()
+logger = logging.getLogger(__name__)
 gemini_api_key = os.getenv("GEMINI_API_KEY")
 if not gemini_api_key:
     raise ValueError("GEMINI_API_KEY is not set in the environment variables.")
 
+# One shared HTTP/2 client so concurrent Runner.run calls multiplex over pooled connections.
+# DefaultAsyncHttpxClient keeps the OpenAI SDK's own defaults (redirects, etc.) for anything not overridden.
+_http = DefaultAsyncHttpxClient(
+    http2=True,
+    limits=httpx.Limits(max_connections=64, max_keepalive_connections=64),
+    timeout=httpx.Timeout(60),
+)
+
 external_client = AsyncOpenAI(
     api_key=gemini_api_key,
     base_url="https://generativelanguage.googleapis.com/v1beta/openai/",
+    http_client=_http,
 )
 
 model = OpenAIChatCompletionsModel(
@@ -31,257 +54,712 @@ config = RunConfig(
 )
 
 # Robust extractor
-def extract_text(run_result: Any) -> str:
+_MISSING = object()
+
+_ATTR_PROBES = (
+    "output_text",
+    "final_output_text",
+    "final_output",
+    "output",
+    "text",
+    "reply",
+    "result",
+    "response",
+)
+
+def _h_str(val: str) -> str:
+    return val.strip()
+
+def _h_dict(val: dict) -> str:
+    # Prefer common keys
+    for k in ("text", "content", "message", "reply"):
+        v = val.get(k)
+        if isinstance(v, str):
+            v = v.strip()
+            if v:
+                return v
+    # fallback to JSON string of dict
+    try:
+        return json.dumps(val)
+    except Exception:
+        return ""
+
+def _h_seq(val: list | tuple) -> str:
+    texts = []
+    for item in val:
+        if isinstance(item, str):
+            item = item.strip()
+            if item:
+                texts.append(item)
+        elif isinstance(item, dict):
+            for k in ("text", "content", "message"):
+                v = item.get(k)
+                if isinstance(v, str):
+                    v = v.strip()
+                    if v:
+                        texts.append(v)
+    return "\n".join(texts)
+
+_BASE_HANDLERS = ((str, _h_str), (dict, _h_dict), (list, _h_seq), (tuple, _h_seq))
+# type -> handler (or None), filled lazily so subclasses and unhandled types are resolved once
+_HANDLERS = dict(_BASE_HANDLERS)
+
+def _handler_for(tp: type):
+    h = _HANDLERS.get(tp, _MISSING)
+    if h is _MISSING:
+        h = next((fn for t, fn in _BASE_HANDLERS if issubclass(tp, t)), None)
+        _HANDLERS[tp] = h
+    return h
+
+# only spaces/tabs after the label, so an empty final output can't swallow the next "- ..." metadata line
+_FINAL_RE = re.compile(r"Final output(?: \(str\))?:\n[ \t]*(\S.*?)(?:\n- |\n\(See|\Z)", re.DOTALL)
+_BLANK_LINES_RE = re.compile(r"\n{2,}")
+
+def _message_text(m: Any) -> str:
+    """Text of a single dict- or object-style message."""
+    texts = []
+    # dict-style message
+    if isinstance(m, dict):
+        # m['content'] may be list/dict/string
+        content = m.get("content", None)
+        if isinstance(content, str):
+            texts.append(content.strip())
+        elif isinstance(content, list):
+            for c in content:
+                if isinstance(c, dict):
+                    if "text" in c and isinstance(c["text"], str):
+                        texts.append(c["text"].strip())
+                    elif "content" in c and isinstance(c["content"], str):
+                        texts.append(c["content"].strip())
+                elif isinstance(c, str):
+                    texts.append(c.strip())
+    # object-style message: try .content or .text
+    elif hasattr(m, "content"):
+        c = getattr(m, "content")
+        if isinstance(c, str):
+            texts.append(c.strip())
+        elif isinstance(c, list):
+            for cc in c:
+                if isinstance(cc, dict) and isinstance(cc.get("text"), str):
+                    texts.append(cc["text"].strip())
+                elif isinstance(cc, str):
+                    texts.append(cc.strip())
+    elif hasattr(m, "text"):
+        t = getattr(m, "text")
+        if isinstance(t, str):
+            texts.append(t.strip())
+    return "\n".join(t for t in texts if t)
+
+def extract_text(run_result: Any, collect_all: bool = False) -> str:
     """
     Robustly extract the human-readable text reply from various RunResult shapes.
     Tries common attributes (output_text, output, final_output, text, messages),
     then falls back to parsing the string representation (looking for "Final output (str):").
+    For messages, only the latest assistant message is used unless collect_all=True,
+    which joins the whole transcript.
     """
     if run_result is None:
         return ""
 
+    # 0) Fast path: plain strings and the SDK's canonical RunResult.final_output
+    if isinstance(run_result, str):
+        return run_result.strip()
+    fo = getattr(run_result, "final_output", None)
+    if isinstance(fo, str):
+        fo = fo.strip()
+        if fo:
+            return fo
+
     # 1) Common direct attrs
-    candidate_attrs = [
-        "output_text",
-        "final_output_text",
-        "final_output",
-        "output",
-        "text",
-        "reply",
-        "result",
-        "response",
-    ]
-    for attr in candidate_attrs:
-        if hasattr(run_result, attr):
-            val = getattr(run_result, attr)
-            if isinstance(val, str) and val.strip():
-                return val.strip()
-            # dict-like
-            if isinstance(val, dict):
-                # Prefer common keys
-                for k in ("text", "content", "message", "reply"):
-                    if k in val and isinstance(val[k], str) and val[k].strip():
-                        return val[k].strip()
-                # fallback to JSON string of dict
-                try:
-                    s = json.dumps(val)
-                    if s:
-                        return s
-                except Exception:
-                    pass
-            # list-like
-            if isinstance(val, (list, tuple)):
-                texts = []
-                for item in val:
-                    if isinstance(item, str) and item.strip():
-                        texts.append(item.strip())
-                    elif isinstance(item, dict):
-                        for k in ("text", "content", "message"):
-                            if k in item and isinstance(item[k], str) and item[k].strip():
-                                texts.append(item[k].strip())
-                if texts:
-                    return "\n".join(texts)
+    for attr in _ATTR_PROBES:
+        val = getattr(run_result, attr, _MISSING)
+        if val is _MISSING:
+            continue
+        h = _handler_for(type(val))
+        if h is not None:
+            r = h(val)
+            if r:
+                return r
 
     # 2) messages-like structures (list of dicts or objects)
     if hasattr(run_result, "messages"):
         msgs = getattr(run_result, "messages")
         try:
-            texts = []
-            for m in msgs:
-                # dict-style message
-                if isinstance(m, dict):
-                    # m['content'] may be list/dict/string
-                    content = m.get("content", None)
-                    if isinstance(content, str) and content.strip():
-                        texts.append(content.strip())
-                    elif isinstance(content, list):
-                        for c in content:
-                            if isinstance(c, dict):
-                                if "text" in c and isinstance(c["text"], str):
-                                    texts.append(c["text"].strip())
-                                elif "content" in c and isinstance(c["content"], str):
-                                    texts.append(c["content"].strip())
-                            elif isinstance(c, str) and c.strip():
-                                texts.append(c.strip())
-                else:
-                    # object-style message: try .content or .text
-                    if hasattr(m, "content"):
-                        c = getattr(m, "content")
-                        if isinstance(c, str) and c.strip():
-                            texts.append(c.strip())
-                        elif isinstance(c, list):
-                            for cc in c:
-                                if isinstance(cc, dict) and "text" in cc:
-                                    texts.append(cc["text"].strip())
-                                elif isinstance(cc, str) and cc.strip():
-                                    texts.append(cc.strip())
-                    elif hasattr(m, "text"):
-                        t = getattr(m, "text")
-                        if isinstance(t, str) and t.strip():
-                            texts.append(t.strip())
-            if texts:
-                return "\n".join(texts)
+            if collect_all:
+                texts = [t for t in map(_message_text, msgs) if t]
+                if texts:
+                    return "\n".join(texts)
+            else:
+                # only the latest assistant message matters; walk back from the end
+                if not isinstance(msgs, (list, tuple)):
+                    msgs = list(msgs)
+                for m in reversed(msgs):
+                    role = m.get("role") if isinstance(m, dict) else getattr(m, "role", None)
+                    if role not in (None, "assistant"):
+                        continue
+                    t = _message_text(m)
+                    if t:
+                        return t
         except Exception:
             pass
 
-    # 3) If run_result itself is a string representation that contains the final output section,
+    # 3) Structured scan of instance fields for a "final*" string, avoiding str() of the whole result
+    fields = getattr(run_result, "__dict__", None)
+    if fields is None and dataclasses.is_dataclass(run_result):
+        fields = {f.name: getattr(run_result, f.name, None) for f in dataclasses.fields(run_result)}
+    if isinstance(fields, dict):
+        for k, v in fields.items():
+            if isinstance(v, str) and "final" in k.lower():
+                v = v.strip()
+                if v:
+                    return v
+
+    # 4) If run_result itself is a string representation that contains the final output section,
     #    parse the "Final output (str):" block from str(run_result)
     try:
         s = str(run_result)
-        # Attempt to capture the multi-line final output block
-        m = re.search(r"Final output \\(str\\):\\n\\s*(.+?)(?:\\n- |\\n\\(See|\\Z)", s, flags=re.DOTALL)
-        if not m:
-            # try without escaping parentheses (some SDKs show 'Final output (str):' plainly)
-            m = re.search(r"Final output \(str\):\n\s*(.+?)(?:\n- |\n\(See|$)", s, flags=re.DOTALL)
-        if not m:
-            # try other label
-            m = re.search(r"Final output:\n\s*(.+?)(?:\n- |\n\(See|$)", s, flags=re.DOTALL)
+        # Capture the multi-line "Final output (str):" / "Final output:" block in one pass
+        m = _FINAL_RE.search(s)
         if m:
             text = m.group(1).strip()
             # Clean repeated lines or trailing metadata markers
             # remove leading/trailing markers
-            text = re.sub(r"\n{2,}", "\n\n", text)  # normalize blank lines
+            text = _BLANK_LINES_RE.sub("\n\n", text)  # normalize blank lines
             return text
     except Exception:
         pass
 
-    # 4) Last resort: try converting run_result to JSON if possible
+    # 5) Last resort: try converting run_result to JSON if possible
     try:
         return json.dumps(run_result)[:10000]
     except Exception:
         pass
 
-    # 5) Final fallback: str()
+    # 6) Final fallback: str()
     return str(run_result).strip()
 
+# Response cache (L1 in-process LRU, L2 JSON files on disk)
+# SUPPORT_CACHE_DIR="" disables the disk layer. Disk entries expire after SUPPORT_CACHE_TTL seconds
+# and the directory is pruned to CACHE_MAX_ENTRIES by mtime (touched on every hit, so this is LRU).
+CACHE_DIR = os.getenv(
+    "SUPPORT_CACHE_DIR",
+    os.path.join(os.getenv("XDG_CACHE_HOME", os.path.expanduser("~/.cache")), "system-support-agent"),
+)
+CACHE_TTL = float(os.getenv("SUPPORT_CACHE_TTL", str(7 * 24 * 3600)))
+CACHE_MAX_ENTRIES = int(os.getenv("SUPPORT_CACHE_MAX_ENTRIES", "1000"))
+CACHE_L1_SIZE = 256
+_l1_cache: "OrderedDict[str, str]" = OrderedDict()
+
+def _cache_key(agent: Agent, input: str, run_config: RunConfig | None = None) -> str:
+    # hash() of a str is salted per process, so digest the instructions instead
+    instructions = agent.instructions if isinstance(agent.instructions, str) else repr(agent.instructions)
+    instr_hash = hashlib.blake2b(instructions.encode(), digest_size=8).hexdigest()
+    # RunConfig.model overrides the agent's own model in the SDK, so key on whichever is actually used
+    used_model = (run_config.model if run_config is not None else None) or agent.model or model
+    model_name = used_model if isinstance(used_model, str) else getattr(used_model, "model", repr(used_model))
+    return hashlib.blake2b(f"{model_name}|{agent.name}|{instr_hash}|{input}".encode(), digest_size=16).hexdigest()
+
+def _l1_put(key: str, text: str) -> None:
+    _l1_cache[key] = text
+    _l1_cache.move_to_end(key)
+    if len(_l1_cache) > CACHE_L1_SIZE:
+        _l1_cache.popitem(last=False)
+
+def _disk_get(key: str) -> str | None:
+    path = os.path.join(CACHE_DIR, f"{key}.json")
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if time.time() - data.get("ts", 0) > CACHE_TTL:
+            os.remove(path)
+            return None
+        os.utime(path)  # mark as recently used for pruning
+        return data["text"]
+    except (OSError, ValueError, KeyError, TypeError, AttributeError):
+        return None
+
+def _disk_put(key: str, text: str) -> None:
+    path = os.path.join(CACHE_DIR, f"{key}.json")
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        # unique per writer: to_thread workers share a pid, so a pid-named temp file could be clobbered
+        fd, tmp = tempfile.mkstemp(dir=CACHE_DIR, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"text": text, "ts": time.time()}, f)
+            os.replace(tmp, path)
+        except BaseException:
+            with contextlib.suppress(OSError):
+                os.remove(tmp)
+            raise
+
+        entries = []
+        for e in os.scandir(CACHE_DIR):
+            if e.name.endswith(".json"):
+                # another thread may evict the same entry first
+                with contextlib.suppress(FileNotFoundError):
+                    entries.append((e.stat().st_mtime, e.path))
+        if len(entries) > CACHE_MAX_ENTRIES:
+            entries.sort()
+            for _, p in entries[: len(entries) - CACHE_MAX_ENTRIES]:
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(p)
+    except OSError:
+        pass
+
+async def _cache_get(key: str) -> str | None:
+    if key in _l1_cache:
+        _l1_cache.move_to_end(key)
+        return _l1_cache[key]
+    if not CACHE_DIR:
+        return None
+    text = await asyncio.to_thread(_disk_get, key)
+    if text is not None:
+        _l1_put(key, text)
+    return text
+
+async def _cache_put(key: str, text: str) -> None:
+    if not text or "runresult" in text.lower():
+        # don't persist unusable replies
+        return
+    _l1_put(key, text)
+    if CACHE_DIR:
+        await asyncio.to_thread(_disk_put, key, text)
+
+async def _run_and_cache(key: str, agent: Agent, input: str, config: RunConfig) -> str:
+    text = await _cache_get(key)
+    if text is not None:
+        return text
+
+    run_result = await Runner.run(agent, input=input, run_config=config)
+    text = extract_text(run_result)
+    await _cache_put(key, text)
+    return text
+
+# key -> task for lookups/runs in progress, so concurrent identical requests share one Runner.run
+_inflight: "dict[str, asyncio.Task[str]]" = {}
+
+async def cached_run(agent: Agent, input: str, config: RunConfig) -> str:
+    """
+    Run an agent and return its extracted reply text, memoized on (agent, instructions, input).
+    Misses call Runner.run; results are kept in memory and persisted atomically under CACHE_DIR.
+    Concurrent calls with the same key await the same run instead of starting their own.
+    """
+    key = _cache_key(agent, input, config)
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.create_task(_run_and_cache(key, agent, input, config))
+        _inflight[key] = task
+        task.add_done_callback(lambda _: _inflight.pop(key, None))
+    # shield so one caller timing out (e.g. the guardrail's wait_for) doesn't cancel the run for the others
+    return await asyncio.shield(task)
+
 # Agents
-triage_agent = Agent(
-    name="Triage Agent",
-    instructions="""
+_INSTR = {
+    k: sys.intern(textwrap.dedent(v).strip())
+    for k, v in {
+        "triage": """
         You are a triage assistant. Your job is to classify user issues into one of three buckets:
         - billing: transactions, payments, invoices, subscriptions
         - technical: crashes, bugs, errors, installations
         - general: product usage, features, or other non-billing/technical issues
         Output ONLY one word (billing, technical, or general). If unsure, output 'general'.
-    """,
+        """,
+        "billing": """
+        You are a billing support agent. The user asks about transactions, charges, refunds or account billing.
+        IMPORTANT: You do NOT have direct access to user bank or account; if the user asks for personal data, explain the limitation
+        and provide instructions to check account/balance via the web portal and steps to contact secure billing support.
+        Keep the answer concise and actionable.
+        """,
+        "technical": """
+        You are a technical support agent. The user asks about crashes, errors, installation problems, performance issues, etc.
+        Ask short clarifying questions if you need more detail; otherwise provide step-by-step troubleshooting.
+        """,
+        "general": """
+        You are a general support agent. Answer product usage or feature questions concisely and include links to docs when helpful.
+        """,
+        "guardrail": """
+        You are a guardrail reviewer. INPUT: a candidate reply from another agent.
+        Task: If the reply contains disallowed or unsafe content (e.g., reveals private data, uses forbidden words),
+        produce a SAFE rewrite of the reply. Otherwise, return the reply UNCHANGED.
+        Return only the final reply text (no extra commentary, no metadata).
+        """,
+    }.items()
+}
+
+triage_agent = Agent(
+    name="Triage Agent",
+    instructions=_INSTR["triage"],
     model=model,
 )
 
 billing_agent = Agent(
     name="Billing Support Agent",
-    instructions="""
-        You are a billing support agent. The user asks about transactions, charges, refunds or account billing.
-        IMPORTANT: You do NOT have direct access to user bank or account; if the user asks for personal data, explain the limitation
-        and provide instructions to check account/balance via the web portal and steps to contact secure billing support.
-        Keep the answer concise and actionable.
-    """,
+    instructions=_INSTR["billing"],
     model=model,
 )
 
 technical_agent = Agent(
     name="Technical Support Agent",
-    instructions="""
-        You are a technical support agent. The user asks about crashes, errors, installation problems, performance issues, etc.
-        Ask short clarifying questions if you need more detail; otherwise provide step-by-step troubleshooting.
-    """,
+    instructions=_INSTR["technical"],
     model=model,
 )
 
 general_agent = Agent(
     name="General Support Agent",
-    instructions="""
-        You are a general support agent. Answer product usage or feature questions concisely and include links to docs when helpful.
-    """,
+    instructions=_INSTR["general"],
     model=model,
 )
 
 guardrail_agent = Agent(
     name="Guardrail Agent",
-    instructions="""
-        You are a guardrail reviewer. INPUT: a candidate reply from another agent.
-        Task: If the reply contains disallowed or unsafe content (e.g., reveals private data, uses forbidden words),
-        produce a SAFE rewrite of the reply. Otherwise, return the reply UNCHANGED.
-        Return only the final reply text (no extra commentary, no metadata).
-    """,
+    instructions=_INSTR["guardrail"],
     model=model,
 )
 
 # Flow
-async def run_support_flow(user_input: str, ctx: dict) -> str:
+GUARDRAIL_TIMEOUT = float(os.getenv("GUARDRAIL_TIMEOUT", "20"))
+
+FORBIDDEN_WORDS = (
+    "password",
+    "passcode",
+    "pin",
+    "cvv",
+    "ssn",
+    "social security",
+    "account number",
+    "routing number",
+)
+
+# Local safety prefilter: replies with no PII-looking tokens and no forbidden words skip the guardrail agent
+_PII = re.compile(
+    r"\b(?:"
+    r"(?:\d[ -]?){12,18}\d"               # card-like digit runs
+    r"|\d{3}-\d{2}-\d{4}"                # SSN
+    r"|\(?\d{3}\)?[ .-]\d{3}[ .-]\d{4}"    # phone
+    r"|[\w.+-]+@[\w-]+\.[\w.-]+"          # email
+    r")\b"
+)
+_FORBIDDEN = re.compile(r"\b(" + "|".join(map(re.escape, FORBIDDEN_WORDS)) + r")\b", re.I)
+
+def needs_guardrail(reply: str) -> bool:
+    return _PII.search(reply) is not None or _FORBIDDEN.search(reply) is not None
+
+_KW_BILL = ("refund", "charge", "invoice", "payment", "transaction", "balance", "account")
+_KW_TECH = ("crash", "error", "bug", "not open", "freeze", "install", "slow")
+
+FALLBACK_REPLY = (
+    "I cannot access your private account here. "
+    "To check your account balance, please sign into the web portal -> Account -> Balance, "
+    "or contact billing support through the Help Center with your account id."
+)
+
+def redact(reply: str) -> str:
+    """Local last-resort scrub of PII and forbidden words, used when the guardrail can't review a flagged reply."""
+    return _FORBIDDEN.sub("[redacted]", _PII.sub("[redacted]", reply))
+
+async def guardrail_review(reply: str) -> str:
+    """
+    Return the guardrail-approved version of reply. Unflagged replies skip the guardrail;
+    flagged replies fail closed to a locally redacted copy if the guardrail times out or returns nothing usable.
+    """
+    if not needs_guardrail(reply):
+        return reply
     try:
-        # 1) Triage
-        triage_run = await Runner.run(
-            triage_agent,
-            input=user_input,
-            run_config=config,
+        final = await asyncio.wait_for(
+            cached_run(guardrail_agent, reply, config),
+            timeout=GUARDRAIL_TIMEOUT,
         )
-        triage_text = extract_text(triage_run).lower()
-        if not triage_text or len(triage_text.split()) > 50 or "runresult" in triage_text.lower():
-            # simple keyword fallback
-            t = user_input.lower()
-            if any(k in t for k in ("refund", "charge", "invoice", "payment", "transaction", "balance", "account")):
-                triage_text = "billing"
-            elif any(k in t for k in ("crash", "error", "bug", "not open", "freeze", "install", "slow")):
-                triage_text = "technical"
-            else:
-                triage_text = "general"
+    except asyncio.TimeoutError:
+        # a stuck guardrail should not block the user, but the flagged text must not go out unreviewed
+        final = ""
+
+    if not final or "runresult" in final.lower():
+        final = redact(reply)
+
+    return final
+
+def keyword_guess(user_input: str) -> str:
+    """Cheap keyword classifier used as triage fallback and speculative agent pick."""
+    t = user_input.lower()
+    if any(k in t for k in _KW_BILL):
+        return "billing"
+    if any(k in t for k in _KW_TECH):
+        return "technical"
+    return "general"
+
+_BILL = re.compile(
+    r"\b(refund(s|ed|ing)?|charg(e|es|ed|ing)|bill(s|ed|ing)?|invoic(e|es|ed|ing)|payments?|transactions?"
+    r"|balances?|subscriptions?)\b",
+    re.I,
+)
+_TECH = re.compile(r"\b(crash(es|ed|ing)?|errors?|bugs?|freez(e|es|ing)|install(s|ed|ing|ation)?|not open(ing)?)\b", re.I)
+
+def local_triage(user_input: str) -> str | None:
+    """
+    Classify obvious billing/technical inputs without an LLM call.
+    Returns None when neither or both buckets match, so the triage agent decides.
+    """
+    bill = _BILL.search(user_input) is not None
+    tech = _TECH.search(user_input) is not None
+    if bill and not tech:
+        return "billing"
+    if tech and not bill:
+        return "technical"
+    return None
+
+def _triage_label(triage_reply: str | BaseException, guess: str) -> str:
+    triage_text = "" if isinstance(triage_reply, BaseException) else triage_reply.lower()
+    if not triage_text or len(triage_text.split()) > 50 or "runresult" in triage_text:
+        # simple keyword fallback
+        return guess
+    return triage_text
 
-        # 2) Select agent
-        if "bill" in triage_text:
-            selected_agent = billing_agent
-        elif "tech" in triage_text or "crash" in triage_text or "error" in triage_text:
-            selected_agent = technical_agent
+def select_agent(label: str) -> Agent:
+    if "bill" in label:
+        return billing_agent
+    if "tech" in label or "crash" in label or "error" in label:
+        return technical_agent
+    return general_agent
+
+async def run_support_flow(user_input: str, ctx: dict) -> str:
+    try:
+        # 1) Triage: obvious inputs are classified locally and skip the triage agent
+        local = local_triage(user_input)
+        if local is not None:
+            logger.debug("triage: local=%s", local)
+            agent_reply = await cached_run(select_agent(local), user_input, config)
         else:
-            selected_agent = general_agent
+            # Ambiguous: ask the triage agent, with the keyword-selected agent dispatched speculatively
+            guess = keyword_guess(user_input)
+            speculative_agent = select_agent(guess)
+            triage_task = asyncio.create_task(
+                cached_run(triage_agent, user_input, config)
+            )
+            speculative_task = asyncio.create_task(
+                cached_run(speculative_agent, user_input, config)
+            )
+            try:
+                triage_reply = await triage_task
+            except Exception as e:
+                triage_reply = e
+            triage_text = _triage_label(triage_reply, guess)
+            logger.debug("triage: keyword=%s llm=%s", guess, triage_text)
 
-        # 3) Ask chosen agent
-        agent_run = await Runner.run(
-            selected_agent,
-            input=user_input,
-            run_config=config,
-        )
-        agent_reply = extract_text(agent_run)
+            # 2) Select agent
+            selected_agent = select_agent(triage_text)
+
+            # 3) Ask chosen agent (reuse the speculative reply when triage agrees)
+            agent_reply = None
+            if selected_agent is speculative_agent:
+                try:
+                    agent_reply = await speculative_task
+                except Exception:
+                    pass
+            else:
+                # don't wait for a reply we won't use; cached_run shields the underlying run,
+                # so it still finishes in the background and fills the cache
+                speculative_task.cancel()
+            if agent_reply is None:
+                agent_reply = await cached_run(selected_agent, user_input, config)
 
         if not agent_reply or "runresult" in agent_reply.lower():
-            agent_reply = (
-                "I cannot access your private account here. "
-                "To check your account balance, please sign into the web portal -> Account -> Balance, "
-                "or contact billing support at billing@example.com with your account id."
-            )
+            agent_reply = FALLBACK_REPLY
 
         # 4) Guardrail review (returns final cleaned / approved reply)
-        guard_run = await Runner.run(
-            guardrail_agent,
-            input=agent_reply,
-            run_config=config,
-        )
-        final = extract_text(guard_run)
+        return await guardrail_review(agent_reply)
 
-        if not final or "runresult" in final.lower():
-            final = agent_reply
+    except Exception as e:
+        return f"An internal error occurred while processing your request. ({e})"
+
+# Streaming flow
+# a paragraph ends at a blank line; splitting on sentence punctuation breaks "e.g." and "1." list markers
+_PARAGRAPH_END = re.compile(r"\n[ \t]*\n\s*")
+
+def _split_paragraphs(buf: str) -> tuple[list[str], str]:
+    """Split buf into completed paragraphs (each keeping its trailing separator) and the unfinished rest."""
+    chunks = []
+    start = 0
+    for m in _PARAGRAPH_END.finditer(buf):
+        if m.end() == len(buf):
+            # more whitespace may still arrive; keep it with the rest
+            break
+        chunks.append(buf[start:m.end()])
+        start = m.end()
+    return chunks, buf[start:]
+
+async def _stream_agent(agent: Agent, user_input: str):
+    """Yield reply text deltas from the agent, serving and filling the response cache."""
+    key = _cache_key(agent, user_input, config)
+    cached = await _cache_get(key)
+    if cached is not None:
+        yield cached
+        return
+
+    parts = []
+    result = Runner.run_streamed(agent, input=user_input, run_config=config)
+    async for event in result.stream_events():
+        if event.type != "raw_response_event":
+            continue
+        if getattr(event.data, "type", "") == "response.output_text.delta":
+            parts.append(event.data.delta)
+            yield event.data.delta
+    # store the same stripped text cached_run would, so both paths share one cache value
+    await _cache_put(key, "".join(parts).strip())
+
+async def _review_chunk(chunk: str) -> str:
+    # keep the separator the guardrail would strip so chunks concatenate cleanly
+    body = chunk.rstrip()
+    if not body:
+        return chunk
+    return await guardrail_review(body) + chunk[len(body):]
 
-        return final
+async def stream_support_flow(user_input: str, ctx: dict):
+    """
+    Like run_support_flow, but yields the reply paragraph by paragraph as the agent streams it.
+    Each completed paragraph is reviewed by the guardrail concurrently with the rest of the stream,
+    and chunks are emitted in order as soon as they clear.
+    """
+    if not hasattr(Runner, "run_streamed"):
+        yield await run_support_flow(user_input, ctx)
+        return
+
+    # review tasks in reply order; None marks the end of the stream
+    reviews: "asyncio.Queue[asyncio.Task | None]" = asyncio.Queue()
+    producer = None
+    try:
+        # 1) Triage (no speculation: the selected agent is streamed, not prefetched)
+        label = local_triage(user_input)
+        if label is None:
+            guess = keyword_guess(user_input)
+            try:
+                triage_reply = await cached_run(triage_agent, user_input, config)
+            except Exception as e:
+                triage_reply = e
+            label = _triage_label(triage_reply, guess)
+        selected_agent = select_agent(label)
+
+        # 2) Stream the agent reply, handing each completed paragraph to the guardrail.
+        #    Reading the stream runs in its own task so approved chunks go out without waiting for more tokens.
+        async def _produce():
+            buf = ""
+            try:
+                async for delta in _stream_agent(selected_agent, user_input):
+                    chunks, buf = _split_paragraphs(buf + delta)
+                    for chunk in chunks:
+                        reviews.put_nowait(asyncio.create_task(_review_chunk(chunk)))
+                if buf:
+                    reviews.put_nowait(asyncio.create_task(_review_chunk(buf)))
+            finally:
+                reviews.put_nowait(None)
+
+        producer = asyncio.create_task(_produce())
+        emitted = False
+
+        def _emittable(chunk: str) -> str | None:
+            # same checks run_support_flow applies to the whole reply, per chunk
+            nonlocal emitted
+            if "runresult" in chunk.lower():
+                return None
+            if not chunk.strip():
+                # blank separators only matter once real text is out
+                return chunk if emitted else None
+            emitted = True
+            return chunk
+
+        # 3) Emit reviewed chunks in order as each one clears
+        while (task := await reviews.get()) is not None:
+            chunk = _emittable(await task)
+            if chunk is not None:
+                yield chunk
+        await producer  # surface streaming errors
+        if not emitted:
+            yield await guardrail_review(FALLBACK_REPLY)
 
     except Exception as e:
-        return f"An internal error occurred while processing your request. ({e})"
+        yield f"An internal error occurred while processing your request. ({e})"
+    finally:
+        if producer is not None:
+            producer.cancel()
+        while not reviews.empty():
+            task = reviews.get_nowait()
+            if task is not None:
+                task.cancel()
+
+# Batch
+SUPPORT_CONCURRENCY = int(os.getenv("SUPPORT_CONCURRENCY", "16"))
+
+async def run_batch(inputs: list[str], ctx: dict, concurrency: int = SUPPORT_CONCURRENCY) -> list[str]:
+    """Run many prompts through run_support_flow concurrently, at most `concurrency` at a time."""
+    sem = asyncio.Semaphore(max(1, concurrency))
+
+    async def _one(x: str) -> str:
+        async with sem:
+            return await run_support_flow(x, ctx)
+
+    return await asyncio.gather(*[_one(x) for x in inputs])
 
 # CLI
-def main():
+async def main_batch(path: str):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            inputs = [line.strip() for line in f if line.strip()]
+    except OSError as e:
+        raise SystemExit(f"error: cannot read batch file {path!r}: {e.strerror or e}")
+    responses = await run_batch(inputs, {"name": "", "is_premium": False})
+    for user_input, response in zip(inputs, responses):
+        print("\nYou:", user_input)
+        print("System:", response)
+
+async def warm_up():
+    """Open the TLS connection (and wake the provider) while the user is still typing."""
+    try:
+        await external_client.models.list()
+    except Exception as e:
+        logger.debug("warm-up failed: %s", e)
+
+async def main_async():
     print("=== Console Support Agent System ===")
-    name = input("Your name (optional): ").strip()
-    premium = input("Are you a premium user? (y/N): ").strip().lower() == "y"
+    warm_task = asyncio.create_task(warm_up())
+    name = (await ainput("Your name (optional): ")).strip()
+    premium = (await ainput("Are you a premium user? (y/N): ")).strip().lower() == "y"
     ctx = {"name": name, "is_premium": premium}
 
     print("\nType your issue (type 'exit' to quit).")
     while True:
-        user_input = input("\nYou: ").strip()
+        user_input = (await ainput("\nYou: ")).strip()
         if not user_input:
             continue
         if user_input.lower() in ("exit", "quit"):
             print("System: Goodbye!")
             break
-        response = asyncio.run(run_support_flow(user_input, ctx))
-        print("\nSystem:", response)
+        print("\nSystem: ", end="", flush=True)
+        async for chunk in stream_support_flow(user_input, ctx):
+            print(chunk, end="", flush=True)
+        print()
+
+    warm_task.cancel()
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Console support agent system.")
+    parser.add_argument(
+        "--batch",
+        metavar="FILE",
+        help="answer the prompts in FILE (one per line) concurrently instead of starting the interactive console",
+    )
+    return parser.parse_args(argv)
+
+async def _run_cli(args: argparse.Namespace):
+    try:
+        if args.batch is not None:
+            await main_batch(args.batch)
+        else:
+            await main_async()
+    finally:
+        await _http.aclose()
+
+def main():
+    asyncio.run(_run_cli(parse_args()))
 
 if __name__ == "__main__":
     main()
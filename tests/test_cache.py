@@ -0,0 +1,138 @@
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+os.environ.setdefault("GEMINI_API_KEY", "test")
+
+import main
+from agents import Agent
+
+
+def _agent(name="A", instructions="do things", model="gemini-2.5-flash"):
+    return Agent(name=name, instructions=instructions, model=model)
+
+
+class CacheKeyTest(unittest.TestCase):
+    def test_key_changes_with_model_name_instructions_and_input(self):
+        base = main._cache_key(_agent(), "hi")
+        self.assertEqual(base, main._cache_key(_agent(), "hi"))
+        variants = {
+            main._cache_key(_agent(model="gemini-2.5-pro"), "hi"),
+            main._cache_key(_agent(name="B"), "hi"),
+            main._cache_key(_agent(instructions="do other things"), "hi"),
+            main._cache_key(_agent(), "hello"),
+        }
+        self.assertEqual(len(variants), 4)
+        self.assertNotIn(base, variants)
+
+    def test_model_object_uses_its_model_name(self):
+        self.assertEqual(
+            main._cache_key(_agent(model=main.model), "hi"),
+            main._cache_key(_agent(model="gemini-2.5-flash"), "hi"),
+        )
+
+
+    def test_run_config_model_overrides_the_agent_model(self):
+        pro = main.RunConfig(model="gemini-2.5-pro")
+        self.assertEqual(
+            main._cache_key(_agent(), "hi", pro),
+            main._cache_key(_agent(model="gemini-2.5-pro"), "hi"),
+        )
+        self.assertEqual(
+            main._cache_key(_agent(model="gemini-2.5-pro"), "hi", main.RunConfig()),
+            main._cache_key(_agent(model="gemini-2.5-pro"), "hi"),
+        )
+        self.assertNotEqual(main._cache_key(_agent(), "hi", pro), main._cache_key(_agent(), "hi"))
+
+
+class DiskCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        for name, value in (("CACHE_DIR", self.tmp.name), ("CACHE_TTL", 60.0), ("CACHE_MAX_ENTRIES", 3)):
+            patcher = mock.patch.object(main, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        main._l1_cache.clear()
+        self.addCleanup(main._l1_cache.clear)
+
+    def _files(self):
+        return sorted(f for f in os.listdir(self.tmp.name) if f.endswith(".json"))
+
+    def test_round_trip_through_disk(self):
+        asyncio.run(main._cache_put("k", "reply"))
+        main._l1_cache.clear()
+        self.assertEqual(asyncio.run(main._cache_get("k")), "reply")
+        self.assertEqual(self._files(), ["k.json"])
+
+    def test_unusable_replies_are_not_stored(self):
+        asyncio.run(main._cache_put("k", ""))
+        asyncio.run(main._cache_put("k2", "RunResult: ..."))
+        self.assertEqual(self._files(), [])
+
+    def test_expired_entry_is_deleted_on_read(self):
+        with open(os.path.join(self.tmp.name, "old.json"), "w", encoding="utf-8") as f:
+            json.dump({"text": "stale", "ts": 0}, f)
+        self.assertIsNone(asyncio.run(main._cache_get("old")))
+        self.assertEqual(self._files(), [])
+
+    def test_directory_is_pruned_least_recently_used_first(self):
+        for i in range(3):
+            asyncio.run(main._cache_put(f"k{i}", f"reply {i}"))
+            os.utime(os.path.join(self.tmp.name, f"k{i}.json"), (i, i))
+        # a disk hit refreshes k0, so k1 is now the oldest
+        main._l1_cache.clear()
+        self.assertEqual(asyncio.run(main._cache_get("k0")), "reply 0")
+        asyncio.run(main._cache_put("k3", "reply 3"))
+        self.assertEqual(self._files(), ["k0.json", "k2.json", "k3.json"])
+
+    def test_concurrent_writers_leave_complete_files_and_no_temp_files(self):
+        texts = [f"reply {i} " + "x" * 50000 for i in range(8)]
+        keys = ["same"] * 8 + [f"k{i}" for i in range(8)]
+
+        async def burst():
+            await asyncio.gather(*(asyncio.to_thread(main._disk_put, k, texts[i % 8]) for i, k in enumerate(keys)))
+
+        asyncio.run(burst())
+        self.assertEqual(os.listdir(self.tmp.name), [f for f in os.listdir(self.tmp.name) if f.endswith(".json")])
+        self.assertLessEqual(len(self._files()), 3)
+        for f in self._files():
+            with open(os.path.join(self.tmp.name, f), encoding="utf-8") as fh:
+                self.assertIn(json.load(fh)["text"], texts)
+
+    def test_empty_cache_dir_disables_disk_layer(self):
+        with mock.patch.object(main, "CACHE_DIR", ""):
+            asyncio.run(main._cache_put("k", "reply"))
+        self.assertEqual(self._files(), [])
+        self.assertEqual(asyncio.run(main._cache_get("k")), "reply")  # still served from memory
+
+    def test_cached_run_calls_runner_once(self):
+        run = mock.AsyncMock(return_value=SimpleNamespace(final_output="answer"))
+        with mock.patch.object(main.Runner, "run", run):
+            first = asyncio.run(main.cached_run(_agent(), "q", main.config))
+            second = asyncio.run(main.cached_run(_agent(), "q", main.config))
+        self.assertEqual((first, second), ("answer", "answer"))
+        run.assert_awaited_once()
+
+    def test_concurrent_identical_calls_share_one_run(self):
+        async def slow_run(agent, input, run_config):
+            await asyncio.sleep(0.01)
+            return SimpleNamespace(final_output="answer")
+
+        async def burst():
+            return await asyncio.gather(*(main.cached_run(_agent(), "same q", main.config) for _ in range(8)))
+
+        run = mock.AsyncMock(side_effect=slow_run)
+        with mock.patch.object(main.Runner, "run", run):
+            replies = asyncio.run(burst())
+        self.assertEqual(replies, ["answer"] * 8)
+        run.assert_awaited_once()
+        self.assertEqual(main._inflight, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
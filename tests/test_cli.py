@@ -0,0 +1,68 @@
+import asyncio
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+os.environ.setdefault("GEMINI_API_KEY", "test")
+
+import main
+
+
+class ParseArgsTest(unittest.TestCase):
+    def test_no_arguments_starts_the_console(self):
+        self.assertIsNone(main.parse_args([]).batch)
+
+    def test_batch_takes_one_path(self):
+        self.assertEqual(main.parse_args(["--batch", "prompts.txt"]).batch, "prompts.txt")
+
+    def test_bad_arguments_exit_instead_of_starting_the_console(self):
+        for argv in (["--batch"], ["--batch", "a.txt", "b.txt"], ["a.txt"]):
+            with self.subTest(argv=argv), contextlib.redirect_stderr(io.StringIO()):
+                with self.assertRaises(SystemExit) as cm:
+                    main.parse_args(argv)
+                self.assertEqual(cm.exception.code, 2)
+
+
+class RunBatchTest(unittest.TestCase):
+    def test_concurrency_is_capped_and_results_keep_input_order(self):
+        in_flight = peak = 0
+
+        async def flow(user_input, ctx):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            # later inputs finish first, so ordering comes from run_batch, not completion time
+            await asyncio.sleep(0.001 * (20 - int(user_input)))
+            in_flight -= 1
+            return f"reply {user_input}"
+
+        inputs = [str(i) for i in range(20)]
+        with mock.patch.object(main, "run_support_flow", flow):
+            replies = asyncio.run(main.run_batch(inputs, {}, concurrency=3))
+        self.assertEqual(replies, [f"reply {i}" for i in inputs])
+        self.assertEqual(peak, 3)
+
+    def test_main_batch_prints_replies_and_skips_blank_lines(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False, encoding="utf-8") as f:
+            f.write("first\n\n  second  \n")
+        self.addCleanup(os.remove, f.name)
+
+        async def flow(user_input, ctx):
+            return user_input.upper()
+
+        out = io.StringIO()
+        with mock.patch.object(main, "run_support_flow", flow), contextlib.redirect_stdout(out):
+            asyncio.run(main.main_batch(f.name))
+        self.assertEqual(out.getvalue(), "\nYou: first\nSystem: FIRST\n\nYou: second\nSystem: SECOND\n")
+
+    def test_missing_batch_file_exits_with_a_message(self):
+        with self.assertRaises(SystemExit) as cm:
+            asyncio.run(main.main_batch("does-not-exist.txt"))
+        self.assertIn("does-not-exist.txt", str(cm.exception.code))
+
+
+if __name__ == "__main__":
+    unittest.main()
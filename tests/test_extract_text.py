@@ -0,0 +1,138 @@
+import dataclasses
+import os
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+os.environ.setdefault("GEMINI_API_KEY", "test")
+
+import main
+from main import extract_text
+
+
+class _Stringified:
+    """Stands in for a RunResult whose only usable shape is its __str__ output."""
+
+    def __init__(self, final_output: str):
+        self._s = (
+            "RunResult:\n"
+            "- Last agent: Agent(name=\"General Support Agent\", ...)\n"
+            f"- Final output (str):\n{final_output}\n"
+            "- 1 new item(s)\n"
+            "- 1 raw response(s)\n"
+            "(See `RunResult` for more details)"
+        )
+
+    def __str__(self):
+        return self._s
+
+
+class ExtractTextFastPathTest(unittest.TestCase):
+    def test_str_result_is_stripped_not_json_quoted(self):
+        self.assertEqual(extract_text("  hi "), "hi")
+
+    def test_blank_final_output_falls_through_to_later_probes(self):
+        for final_output in ("", "   \n"):
+            with self.subTest(final_output=final_output):
+                result = SimpleNamespace(final_output=final_output, output=" from output ")
+                self.assertEqual(extract_text(result), "from output")
+
+
+class ExtractTextAttributesTest(unittest.TestCase):
+    def setUp(self):
+        # the handler table is module-level and filled lazily; give each test its own copy
+        patcher = mock.patch.object(main, "_HANDLERS", dict(main._BASE_HANDLERS))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_probes_attributes_in_order(self):
+        result = SimpleNamespace(final_output=None, output=[{"text": " a "}, " b"], text="later")
+        self.assertEqual(extract_text(result), "a\nb")
+
+    def test_dict_falls_back_to_json(self):
+        self.assertEqual(extract_text(SimpleNamespace(output={"x": 1})), '{"x": 1}')
+
+    def test_subclasses_and_unhandled_types_resolve_once(self):
+        class Text(str):
+            pass
+
+        class Model:
+            pass
+
+        result = SimpleNamespace(final_output=Model(), output=None, text=Text(" sub "))
+        self.assertEqual(extract_text(result), "sub")
+        self.assertIs(main._HANDLERS[Text], main._h_str)
+        self.assertIsNone(main._HANDLERS[Model])
+        self.assertIsNone(main._HANDLERS[type(None)])
+
+
+class ExtractTextMessagesTest(unittest.TestCase):
+    MESSAGES = [
+        {"role": "user", "content": "my question"},
+        {"role": "assistant", "content": [{"type": "output_text", "text": " first answer "}]},
+        {"role": "user", "content": "follow-up"},
+        {"role": "assistant", "content": "latest answer"},
+        {"role": "tool", "content": "tool output"},
+    ]
+
+    def test_returns_latest_assistant_message(self):
+        self.assertEqual(extract_text(SimpleNamespace(messages=self.MESSAGES)), "latest answer")
+
+    def test_skips_empty_assistant_messages(self):
+        msgs = self.MESSAGES[:2] + [{"role": "assistant", "content": "  "}]
+        self.assertEqual(extract_text(SimpleNamespace(messages=msgs)), "first answer")
+
+    def test_object_messages_without_role(self):
+        msgs = iter([SimpleNamespace(content="older"), SimpleNamespace(text="newest")])
+        self.assertEqual(extract_text(SimpleNamespace(messages=msgs)), "newest")
+
+    def test_collect_all_joins_the_transcript(self):
+        self.assertEqual(
+            extract_text(SimpleNamespace(messages=self.MESSAGES), collect_all=True),
+            "my question\nfirst answer\nfollow-up\nlatest answer\ntool output",
+        )
+
+
+class _NoStr:
+    __slots__ = ()
+
+    def __str__(self):
+        raise AssertionError("extract_text should not stringify this result")
+
+
+class ExtractTextFieldsTest(unittest.TestCase):
+    def test_final_field_in_instance_dict(self):
+        class Result(_NoStr):
+            def __init__(self):
+                self.last_agent = "General Support Agent"
+                self.final_answer = "  Restart the app.  "
+
+        self.assertEqual(extract_text(Result()), "Restart the app.")
+
+    def test_final_field_in_slotted_dataclass(self):
+        @dataclasses.dataclass(slots=True)
+        class Result(_NoStr):
+            last_agent: str
+            final_answer: str
+
+        result = Result("General Support Agent", " Restart the app. ")
+        self.assertFalse(hasattr(result, "__dict__"))
+        self.assertEqual(extract_text(result), "Restart the app.")
+
+
+class ExtractTextFinalOutputTest(unittest.TestCase):
+    def test_final_output_block_is_parsed(self):
+        text = extract_text(_Stringified("    Restart the app.\n    Then retry."))
+        self.assertEqual(text, "Restart the app.\n    Then retry.")
+
+    def test_empty_final_output_does_not_return_metadata(self):
+        for final_output in ("", "   "):
+            with self.subTest(final_output=final_output):
+                text = extract_text(_Stringified(final_output))
+                self.assertNotEqual(text, "- 1 new item(s)")
+                # left unparsed, so callers' "runresult" check swaps in the fallback reply
+                self.assertTrue(text.startswith("RunResult:"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+import asyncio
+import os
+import time
+import unittest
+from unittest import mock
+
+os.environ.setdefault("GEMINI_API_KEY", "test")
+
+import main
+
+
+class _FakeCachedRun:
+    """Records the agents cached_run is asked for and replays scripted replies (or raises) per agent name."""
+
+    def __init__(self, replies, delays=None):
+        self.replies = {name: list(r) for name, r in replies.items()}
+        self.delays = delays or {}
+        self.calls = []
+
+    async def __call__(self, agent, input, config):
+        self.calls.append(agent.name)
+        await asyncio.sleep(self.delays.get(agent.name, 0))
+        reply = self.replies[agent.name].pop(0)
+        if isinstance(reply, BaseException):
+            raise reply
+        return reply
+
+
+class RunSupportFlowTest(unittest.TestCase):
+    # matches no local billing/technical pattern and keyword_guess picks "general"
+    AMBIGUOUS = "How do I export my data?"
+
+    def _run(self, user_input, replies, delays=None):
+        fake = _FakeCachedRun(replies, delays)
+        with mock.patch.object(main, "cached_run", fake):
+            reply = asyncio.run(main.run_support_flow(user_input, {}))
+        return reply, fake.calls
+
+    def test_obvious_input_skips_the_triage_agent(self):
+        reply, calls = self._run("I want a refund", {main.billing_agent.name: ["Refunds take 5 days."]})
+        self.assertEqual(reply, "Refunds take 5 days.")
+        self.assertEqual(calls, [main.billing_agent.name])
+
+    def test_speculative_reply_is_reused_when_triage_agrees(self):
+        reply, calls = self._run(self.AMBIGUOUS, {
+            main.triage_agent.name: ["general"],
+            main.general_agent.name: ["Use Settings -> Export."],
+        })
+        self.assertEqual(reply, "Use Settings -> Export.")
+        self.assertEqual(calls, [main.triage_agent.name, main.general_agent.name])
+
+    def test_triage_disagreement_runs_the_selected_agent(self):
+        reply, calls = self._run(self.AMBIGUOUS, {
+            main.triage_agent.name: ["billing"],
+            main.general_agent.name: ["Use Settings -> Export."],
+            main.billing_agent.name: ["Exports are free on every plan."],
+        })
+        self.assertEqual(reply, "Exports are free on every plan.")
+        self.assertEqual(calls, [main.triage_agent.name, main.general_agent.name, main.billing_agent.name])
+
+    def test_triage_disagreement_does_not_wait_for_the_speculative_reply(self):
+        start = time.perf_counter()
+        reply, calls = self._run(self.AMBIGUOUS, {
+            main.triage_agent.name: ["billing"],
+            main.general_agent.name: ["Use Settings -> Export."],
+            main.billing_agent.name: ["Exports are free on every plan."],
+        }, delays={main.triage_agent.name: 0.01, main.general_agent.name: 1.0, main.billing_agent.name: 0.01})
+        elapsed = time.perf_counter() - start
+        self.assertEqual(reply, "Exports are free on every plan.")
+        self.assertEqual(calls, [main.triage_agent.name, main.general_agent.name, main.billing_agent.name])
+        self.assertLess(elapsed, 0.5)
+
+    def test_triage_failure_falls_back_to_the_keyword_guess(self):
+        reply, calls = self._run(self.AMBIGUOUS, {
+            main.triage_agent.name: [RuntimeError("triage down")],
+            main.general_agent.name: ["Use Settings -> Export."],
+        })
+        self.assertEqual(reply, "Use Settings -> Export.")
+        self.assertEqual(calls, [main.triage_agent.name, main.general_agent.name])
+
+    def test_failed_speculative_run_is_retried(self):
+        reply, calls = self._run(self.AMBIGUOUS, {
+            main.triage_agent.name: ["general"],
+            main.general_agent.name: [RuntimeError("flaky"), "Use Settings -> Export."],
+        })
+        self.assertEqual(reply, "Use Settings -> Export.")
+        self.assertEqual(calls, [main.triage_agent.name, main.general_agent.name, main.general_agent.name])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+import asyncio
+import os
+import unittest
+from unittest import mock
+
+os.environ.setdefault("GEMINI_API_KEY", "test")
+
+import main
+
+
+async def _hang(*args, **kwargs):
+    await asyncio.Event().wait()
+
+
+class NeedsGuardrailTest(unittest.TestCase):
+    CASES = [
+        ("Restart the app and try again.", False),
+        ("Step 1 of 3, version 2024.", False),
+        ("Your card 4111 1111 1111 1111 was declined.", True),
+        ("Card 4111111111111111 on file.", True),
+        ("SSN 123-45-6789", True),
+        ("Call (555) 123-4567 for help.", True),
+        ("Call 555.123.4567 for help.", True),
+        ("Write to jane.doe+help@example.co.uk", True),
+        ("Enter your PIN at the prompt.", True),
+        ("Never share your Password.", True),
+        ("Read the spinner docs.", False),  # 'pin' only as a whole word
+    ]
+
+    def test_table(self):
+        for text, expected in self.CASES:
+            with self.subTest(text=text):
+                self.assertIs(main.needs_guardrail(text), expected)
+
+
+class GuardrailReviewTest(unittest.TestCase):
+    def test_canned_fallback_reply_needs_no_review(self):
+        self.assertFalse(main.needs_guardrail(main.FALLBACK_REPLY))
+
+    def test_unflagged_reply_skips_the_guardrail(self):
+        run = mock.AsyncMock()
+        with mock.patch.object(main, "cached_run", run):
+            self.assertEqual(asyncio.run(main.guardrail_review("All good.")), "All good.")
+        run.assert_not_awaited()
+
+    def test_flagged_reply_uses_the_guardrail_rewrite(self):
+        run = mock.AsyncMock(return_value="Please contact support.")
+        with mock.patch.object(main, "cached_run", run):
+            self.assertEqual(asyncio.run(main.guardrail_review("Call 555-123-4567.")), "Please contact support.")
+
+    def test_stuck_guardrail_does_not_leak_flagged_text(self):
+        reply = "Call 555-123-4567 or mail jane@example.com, and keep your password safe."
+        with mock.patch.object(main, "cached_run", _hang), mock.patch.object(main, "GUARDRAIL_TIMEOUT", 0.01):
+            final = asyncio.run(main.guardrail_review(reply))
+        self.assertNotIn("555-123-4567", final)
+        self.assertNotIn("jane@example.com", final)
+        self.assertNotIn("password", final.lower())
+        self.assertFalse(main.needs_guardrail(final))
+
+    def test_unusable_guardrail_reply_does_not_leak_flagged_text(self):
+        for bad in ("", "RunResult: ..."):
+            with self.subTest(bad=bad), mock.patch.object(main, "cached_run", mock.AsyncMock(return_value=bad)):
+                self.assertNotIn("555-123-4567", asyncio.run(main.guardrail_review("Call 555-123-4567.")))
+
+    def test_stuck_guardrail_in_streamed_chunk(self):
+        with mock.patch.object(main, "cached_run", _hang), mock.patch.object(main, "GUARDRAIL_TIMEOUT", 0.01):
+            chunk = asyncio.run(main._review_chunk("Call 555-123-4567.\n"))
+        self.assertNotIn("555-123-4567", chunk)
+        self.assertTrue(chunk.endswith("\n"))
+
+
+if __name__ == "__main__":
+    unittest.main()
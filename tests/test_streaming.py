@@ -0,0 +1,107 @@
+import asyncio
+import os
+import time
+import unittest
+from unittest import mock
+
+os.environ.setdefault("GEMINI_API_KEY", "test")
+
+import main
+
+
+def _fake_stream(*deltas):
+    async def stream(agent, user_input):
+        for d in deltas:
+            await asyncio.sleep(0)
+            yield d
+    return stream
+
+
+async def _collect(user_input="the app crashes"):
+    return [c async for c in main.stream_support_flow(user_input, {})]
+
+
+class SplitParagraphsTest(unittest.TestCase):
+    def test_abbreviations_and_list_numbers_do_not_split(self):
+        text = "Go to Settings, e.g. the gear icon. Then 1. click Save"
+        self.assertEqual(main._split_paragraphs(text), ([], text))
+
+    def test_blank_lines_end_paragraphs_and_text_reassembles(self):
+        text = "First para.\nStill first.\n\n1. Step one\n2. Step two\n \n\nTail"
+        chunks, rest = main._split_paragraphs(text)
+        self.assertEqual(chunks, ["First para.\nStill first.\n\n", "1. Step one\n2. Step two\n \n\n"])
+        self.assertEqual(rest, "Tail")
+        self.assertEqual("".join(chunks) + rest, text)
+
+    def test_trailing_separator_waits_for_more_text(self):
+        self.assertEqual(main._split_paragraphs("Para.\n\n"), ([], "Para.\n\n"))
+
+    def test_incremental_feeding_matches_whole_text(self):
+        text = "A. e.g. b.\n\nSecond 1. two.\n\n\nThird"
+        chunks, buf = [], ""
+        for ch in text:
+            done, buf = main._split_paragraphs(buf + ch)
+            chunks.extend(done)
+        self.assertEqual(chunks, main._split_paragraphs(text)[0])
+        self.assertEqual("".join(chunks) + buf, text)
+
+
+class StreamSupportFlowTest(unittest.TestCase):
+    def test_chunks_are_emitted_in_order_even_when_reviews_finish_out_of_order(self):
+        paragraphs = ["one\n\n", "two\n\n", "three"]
+        delays = {"one\n\n": 0.03, "two\n\n": 0.0, "three": 0.01}
+
+        async def review(chunk):
+            await asyncio.sleep(delays[chunk])
+            return chunk.upper()
+
+        with mock.patch.object(main, "_stream_agent", _fake_stream(*paragraphs)), \
+                mock.patch.object(main, "_review_chunk", review):
+            out = asyncio.run(_collect())
+        self.assertEqual(out, ["ONE\n\n", "TWO\n\n", "THREE"])
+
+    def test_cleared_paragraph_is_not_held_back_until_the_next_delta(self):
+        async def stream(agent, user_input):
+            yield "Para one.\n\nPara"
+            await asyncio.sleep(0.5)
+            yield " two."
+
+        async def timed():
+            start = time.perf_counter()
+            return [(c, time.perf_counter() - start) async for c in main.stream_support_flow("the app crashes", {})]
+
+        with mock.patch.object(main, "_stream_agent", stream):
+            out = asyncio.run(timed())
+        self.assertEqual([c for c, _ in out], ["Para one.\n\n", "Para two."])
+        self.assertLess(out[0][1], 0.25)
+        self.assertGreaterEqual(out[1][1], 0.5)
+
+    def test_stream_error_after_output_reports_the_error(self):
+        async def stream(agent, user_input):
+            yield "Para one.\n\nPara"
+            raise RuntimeError("stream dropped")
+
+        with mock.patch.object(main, "_stream_agent", stream):
+            out = asyncio.run(_collect())
+        self.assertEqual(out[0], "Para one.\n\n")
+        self.assertEqual(len(out), 2)
+        self.assertIn("stream dropped", out[1])
+
+    def test_one_guardrail_call_per_flagged_paragraph(self):
+        run = mock.AsyncMock(return_value="Please contact support.")
+        deltas = ["Go to Settings, e.g. the gear icon. ", "Then 1. call 555-123-4567. ", "Done.\n\nAll set."]
+        with mock.patch.object(main, "_stream_agent", _fake_stream(*deltas)), \
+                mock.patch.object(main, "cached_run", run):
+            out = asyncio.run(_collect())
+        self.assertEqual(out, ["Please contact support.\n\n", "All set."])
+        run.assert_awaited_once()
+        self.assertEqual(run.await_args.args[1], "Go to Settings, e.g. the gear icon. Then 1. call 555-123-4567. Done.")
+
+    def test_blank_or_unusable_reply_yields_the_fallback(self):
+        for deltas in (("   ",), ("RunResult: ...",)):
+            with self.subTest(deltas=deltas), mock.patch.object(main, "_stream_agent", _fake_stream(*deltas)):
+                self.assertEqual(asyncio.run(_collect()), [main.FALLBACK_REPLY])
+
+
+if __name__ == "__main__":
+    unittest.main()
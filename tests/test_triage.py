@@ -0,0 +1,56 @@
+import os
+import unittest
+
+os.environ.setdefault("GEMINI_API_KEY", "test")
+
+import main
+
+
+class LocalTriageTest(unittest.TestCase):
+    CASES = [
+        # obvious billing
+        ("I want a refund", "billing"),
+        ("I was charged twice", "billing"),
+        ("I got billed twice", "billing"),
+        ("Where is my invoice?", "billing"),
+        ("Cancel my subscriptions", "billing"),
+        ("My payment failed", "billing"),
+        # obvious technical
+        ("App crashes on start", "technical"),
+        ("The app crashed again", "technical"),
+        ("Installation failed with an error", "technical"),
+        ("It freezes when I scroll", "technical"),
+        # ambiguous or unmatched: the triage agent decides
+        ("Refund after the app crashed", None),
+        ("How do I cancel my plan?", None),
+        ("How to delete my account", None),
+        ("How can I export my data?", None),
+        ("hello there", None),
+        ("", None),
+    ]
+
+    def test_table(self):
+        for text, expected in self.CASES:
+            with self.subTest(text=text):
+                self.assertEqual(main.local_triage(text), expected)
+
+    def test_local_labels_select_the_matching_agent(self):
+        self.assertIs(main.select_agent(main.local_triage("refund please")), main.billing_agent)
+        self.assertIs(main.select_agent(main.local_triage("it crashes")), main.technical_agent)
+
+
+class KeywordFallbackTest(unittest.TestCase):
+    def test_keyword_guess(self):
+        self.assertEqual(main.keyword_guess("How to delete my account"), "billing")
+        self.assertEqual(main.keyword_guess("The app is slow"), "technical")
+        self.assertEqual(main.keyword_guess("How do I export data?"), "general")
+
+    def test_unusable_triage_reply_falls_back_to_guess(self):
+        self.assertEqual(main._triage_label("Billing", "general"), "billing")
+        self.assertEqual(main._triage_label("", "technical"), "technical")
+        self.assertEqual(main._triage_label(RuntimeError("boom"), "billing"), "billing")
+        self.assertEqual(main._triage_label("word " * 51, "general"), "general")
+
+
+if __name__ == "__main__":
+    unittest.main()